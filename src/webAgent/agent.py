@@ -1,13 +1,91 @@
+import asyncio
+import concurrent.futures
+import functools
 import inspect
 import json
 import re
-from typing import Callable, Dict, Generator, List, Literal, get_args, get_origin
+import textwrap
+from functools import partial
+from typing import AsyncGenerator, Callable, Dict, List, Literal, get_args, get_origin
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI
+
+try:
+    # Rust SIMD JSON parser, several times faster than stdlib json
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Shared executor used to run blocking tool calls off the event loop
+_tool_executor = concurrent.futures.ThreadPoolExecutor()
+
+# JSON schema types for primitive annotations, a lookup instead of an if/elif cascade
+_PRIMITIVES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+# How many of the newest tool results stay verbatim on the wire
+_TOOL_RESULTS_KEPT = 2
+# Tool results shorter than this are never worth eliding
+_TOOL_RESULT_MIN_ELIDE = 500
+
+
+def _compact_history(messages) -> list:
+    """
+    Builds the wire copy of the history with stale tool outputs elided.
+
+    Only the newest tool results are sent verbatim; older page snapshots are
+    replaced with a one-line stub so multi-hundred-kB blobs from previous
+    steps are not re-uploaded on every round trip. The caller's history is
+    left untouched.
+
+    :param messages: The full conversation history.
+    :return: A compacted copy of the history.
+    """
+    tool_indexes = [i for i, message in enumerate(messages) if message.get("role") == "tool"]
+    stale = set(tool_indexes[: -_TOOL_RESULTS_KEPT] if _TOOL_RESULTS_KEPT else tool_indexes)
+    # The newest results can be contentless stubs ('unchanged since ref',
+    # changed fragments), so the most recent full page snapshot is kept
+    # verbatim even when it falls outside the kept window — eliding it
+    # would leave the model with no page content or element ids mid-task
+    for i in reversed(tool_indexes):
+        content = messages[i].get("content") or ""
+        if "\nSource: " in content and "(unchanged since ref=" not in content:
+            stale.discard(i)
+            break
+    compacted = []
+    for i, message in enumerate(messages):
+        content = message.get("content") or ""
+        if i in stale and len(content) > _TOOL_RESULT_MIN_ELIDE:
+            message = {**message, "content": f"<tool result elided, {len(content)} chars, already consumed>"}
+        compacted.append(message)
+    return compacted
+
+# One warm HTTP/2 connection pool for every OpenAI client, so recursive
+# send rounds and Streamlit reruns reuse keep-alive connections instead of
+# paying a new TCP/TLS handshake per request
+_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+)
+
+# Built once so the bytes sent for the static prefix are identical on every call,
+# which lets providers reuse their prompt/prefix cache across the whole conversation
+DEFAULT_SYSTEM_PROMPT = textwrap.dedent(
+    """
+    You are a web assistant and your job is to perform tasks set by the user on your own, interacting with pages using JavaScript.
+    Cite all sources you find clearly by site name and link.
+    Always check the source information outside the interactive elements, as the action might have already been completed even if the interactive elements are still present.
+    It is necessary to confirm that the object has actually been carried out successfully by consulting the source page.
+    After completing the tasks, close WebDriver and reply to the user
+    """
+).strip()
 
 
 class Agent:
-    _tools = {}
+    # OpenAI clients shared across instances, keyed by (base_url, api_key)
+    _clients = {}
 
     def __init__(self, api_key: str, base_url: str = "https://api.openai.com/v1/"):
         """
@@ -16,30 +94,33 @@ class Agent:
         :param base_url: The base URL for the OpenAI API.
         :param api_key: The API key for authentication.
         """
-        self.client = OpenAI(base_url=base_url, api_key=api_key)
+        key = (base_url, api_key)
+        if key not in Agent._clients:
+            Agent._clients[key] = AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=_http_client)
+        self.client = Agent._clients[key]
+        # Per-instance registry, a class-level dict would leak tools between agents
+        self._tools = {}
+        # Serialized tools list for chat.completions.create, rebuilt only when _tools changes
+        self._tools_payload = None
 
-    def send(
+    async def send(
         self,
         model,
         prompt: str = None,
         messages: list[str] = [],
         think: Literal["/no_think", "/think"] = "/no_think",
-        system_prompts: list[str] = [
-            """
-        You are a web assistant and your job is to perform tasks set by the user on your own, interacting with pages using JavaScript.
-        Cite all sources you find clearly by site name and link.
-        Always check the source information outside the interactive elements, as the action might have already been completed even if the interactive elements are still present.
-        It is necessary to confirm that the object has actually been carried out successfully by consulting the source page.
-        After completing the tasks, close WebDriver and reply to the user
-        """,
-        ],
+        system_prompts: list[str] = [DEFAULT_SYSTEM_PROMPT],
         temperature=0,
-    ) -> Generator:
+        n: int = 1,
+    ) -> AsyncGenerator:
         """
         Send a prompt to the model and return the response.
 
         :param model: The model to use for the request.
         :param prompt: The prompt to send to the model.
+        :param n: Number of candidate completions to request. Only the first
+            candidate is streamed and acted on; extra candidates are free
+            throughput on request-per-minute-bound providers.
         :return: The response from the model.
         """
         if prompt:
@@ -51,151 +132,212 @@ class Agent:
             else:
                 system_prompts[i] = sprompt
 
-        stream = self.client.chat.completions.create(
-            model=model,
-            messages=[
-                *[{"role": "system", "content": message} for message in system_prompts],
-                {"role": "user", "content": think},
-                *messages,
-            ],
-            tools=[
-                {
-                    "type": tool["type"],
-                    tool["type"]: {
-                        "name": name,
-                        "description": tool["description"],
-                        "parameters": tool["parameters"],
-                        "strict": tool["strict"],
-                    },
-                }
-                for name, tool in self._tools.items()
-            ],
-            temperature=temperature,
-            reasoning_effort="high",
-            stream=True,
-        )
-
-        final_tool_calls = {}
-        for chunk in stream:
-            chunk.choices[0]
-            # Check if the chunk contains a tool call
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
-            elif chunk.choices[0].delta.tool_calls:
-                # Store all tools
-                for tool_call in chunk.choices[0].delta.tool_calls or []:
-                    index = tool_call.index
-                    if index not in final_tool_calls:
-                        final_tool_calls[index] = tool_call
-                    if final_tool_calls[index].function.arguments != tool_call.function.arguments:
-                        # Prevent duplicate arguments using gemini models
-                        final_tool_calls[index].function.arguments += tool_call.function.arguments
-
-        for index, tool_call in final_tool_calls.items():
-            # Call the function with the arguments
-            tool = self._tools[tool_call.function.name]
-            args = json.loads(tool_call.function.arguments)
-            result = tool["function"](**args)
-            messages.append({"role": "assistant", "content": [], "tool_calls": [tool_call]})
-            messages.append({"role": "tool", "tool_call_id": tool_call.id, "content": str(result)})
-            # Send the result back to the model
-            yield " "
-            for result in self.send(
+        # Iterate model round trips in place instead of recursing per tool round,
+        # each pass reuses the cached tools payload and the same generator frame
+        while True:
+            if self._tools_payload is None:
+                self._tools_payload = [
+                    {
+                        "type": tool["type"],
+                        tool["type"]: {
+                            "name": name,
+                            "description": tool["description"],
+                            "parameters": tool["parameters"],
+                            "strict": tool["strict"],
+                        },
+                    }
+                    for name, tool in self._tools.items()
+                ]
+
+            stream = await self.client.chat.completions.create(
                 model=model,
-                prompt=prompt,
-                messages=messages,
-                system_prompts=system_prompts,
-            ):
-                yield result
+                messages=[
+                    *[{"role": "system", "content": message} for message in system_prompts],
+                    {"role": "user", "content": think},
+                    *_compact_history(messages),
+                ],
+                tools=self._tools_payload,
+                temperature=temperature,
+                reasoning_effort="high",
+                n=n,
+                stream=True,
+            )
+
+            final_tool_calls = {}
+            async for chunk in stream:
+                # With n > 1 only the first candidate drives the stream
+                if chunk.choices[0].index != 0:
+                    continue
+                # Check if the chunk contains a tool call
+                if chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                elif chunk.choices[0].delta.tool_calls:
+                    # Store all tools, collecting argument fragments in a list so
+                    # accumulation stays linear instead of re-building one big string
+                    for tool_call in chunk.choices[0].delta.tool_calls or []:
+                        index = tool_call.index
+                        fragment = tool_call.function.arguments or ""
+                        if index not in final_tool_calls:
+                            final_tool_calls[index] = {
+                                "meta": tool_call,
+                                "parts": [fragment],
+                                "length": len(fragment),
+                            }
+                            continue
+                        entry = final_tool_calls[index]
+                        if fragment:
+                            # Prevent duplicate arguments using gemini models, which
+                            # re-send the full accumulated string; only a fragment of
+                            # exactly that length can collide, so the join is rare
+                            if len(fragment) == entry["length"] and fragment == "".join(entry["parts"]):
+                                continue
+                            entry["parts"].append(fragment)
+                            entry["length"] += len(fragment)
+
+            if not final_tool_calls:
+                # No tool round requested, the streamed answer is final
+                return
 
-    def add_tool(self, func: Callable[..., str], strict: bool = False) -> None:
+            ordered_calls = []
+            for index in sorted(final_tool_calls):
+                entry = final_tool_calls[index]
+                tool_call = entry["meta"]
+                tool_call.function.arguments = "".join(entry["parts"])
+                ordered_calls.append(tool_call)
+            results = {}
+            loop = asyncio.get_running_loop()
+            # Only dispatch concurrently when every requested tool is marked safe,
+            # tools sharing state (e.g. one WebDriver) must run one-by-one
+            parallel = len(ordered_calls) > 1 and all(
+                self._tools[tool_call.function.name]["parallel_safe"] for tool_call in ordered_calls
+            )
+            if parallel:
+                gathered = await asyncio.gather(
+                    *[
+                        loop.run_in_executor(
+                            _tool_executor,
+                            partial(
+                                self._tools[tool_call.function.name]["function"],
+                                **_json_loads(tool_call.function.arguments),
+                            ),
+                        )
+                        for tool_call in ordered_calls
+                    ]
+                )
+                for tool_call, result in zip(ordered_calls, gathered):
+                    results[tool_call.index] = result
+            else:
+                for tool_call in ordered_calls:
+                    # Call the function with the arguments, off the event loop
+                    tool = self._tools[tool_call.function.name]
+                    args = _json_loads(tool_call.function.arguments)
+                    results[tool_call.index] = await loop.run_in_executor(
+                        _tool_executor, partial(tool["function"], **args)
+                    )
+
+            # Append every call/result pair in index order, then do a single model round trip
+            for tool_call in ordered_calls:
+                messages.append({"role": "assistant", "content": [], "tool_calls": [tool_call]})
+                messages.append(
+                    {"role": "tool", "tool_call_id": tool_call.id, "content": str(results[tool_call.index])}
+                )
+            # Loop back to send the results to the model
+            yield " "
+
+    def add_tool(self, func: Callable[..., str], strict: bool = False, parallel_safe: bool = True) -> None:
         """
         Add a tool to the agent.
 
         :param func: The function to add as a tool.
         :param strict: Whether to use strict mode for the tool.
+        :param parallel_safe: Whether the tool can run concurrently with other tools.
         """
         name = func.__name__
         description = inspect.getdoc(func)
         if description is None:
             description = "No description provided."
-        parameters = self.__get_tool_parameters(func, strict)
+        # Cache on the underlying function for bound methods, keying on the
+        # method itself would pin its instance (and any WebDriver session it
+        # holds) in the cache long after a browser reset
+        parameters = _get_tool_parameters(getattr(func, "__func__", func), strict)
         self._tools[name] = {
             "type": "function",
             "name": name,
             "description": description,
             "parameters": parameters,
             "strict": strict,
+            "parallel_safe": parallel_safe,
             "function": func,
         }
+        # Invalidate the serialized tools list so send rebuilds it
+        self._tools_payload = None
 
-    def __get_tool_parameters(self, func: Callable[..., str], strict: bool) -> dict:
-        """
-        Dynamically creates a JSON schema for function parameters based on type hints.
+@functools.lru_cache(maxsize=None)
+def _get_tool_parameters(func: Callable[..., str], strict: bool) -> dict:
+    """
+    Dynamically creates a JSON schema for function parameters based on type hints.
 
-        :param func: The function to get the parameters from.
-        :return: A dictionary representing the JSON schema of the parameters.
-        """
-        sig = inspect.signature(func)
-        properties = {}
-        required = []
-
-        for name, param in sig.parameters.items():
-            param_type = param.annotation
-            schema = {}
-
-            if param.annotation == inspect.Parameter.empty:
-                # Default to 'string' for parameters without type hints
-                schema["type"] = "string"
-            elif hasattr(param_type, "__origin__") and param_type.__origin__ == Literal:
-                schema["type"] = "string"  # Literals are often strings
-                schema["enum"] = list(param_type.__args__)
-            elif param_type is str:
-                schema["type"] = "string"
-            elif param_type is int:
-                schema["type"] = "integer"
-            elif param_type is float:
-                schema["type"] = "number"
-            elif param_type is bool:
-                schema["type"] = "boolean"
-            elif get_origin(param_type) in [list, List]:  # Handle list types
-                schema["type"] = "array"
-                # Process the type of items in the list
-                if get_args(param_type):
-                    item_type = get_args(param_type)[0]
-                    # For now, let's handle simple types.
-                    if item_type is str:
-                        schema["items"] = {"type": "string"}
-                    elif item_type is int:
-                        schema["items"] = {"type": "integer"}
-                    elif item_type is float:
-                        schema["items"] = {"type": "number"}
-                    elif item_type is bool:
-                        schema["items"] = {"type": "boolean"}
-                    # Handle List[Dict]
-                    elif get_origin(item_type) in [dict, Dict]:
-                        schema["items"] = {
-                            "type": "object",
-                            "additionalProperties": not strict,
-                        }
-                else:
-                    schema["items"] = {"type": "string"}  # Default for list with no specified item type
-            elif get_origin(param_type) in [dict, Dict]:  # Handle dict types
-                schema["type"] = "object"
-                # For a generic Dict, OpenAI functions usually expect 'object' without specific properties
-                # For a truly generic dictionary, you might use additionalProperties.
-                # Allows any properties
-                schema["additionalProperties"] = not strict
-            else:
-                # For any other unhandled complex types, or if strictness requires it,
-                # one might raise an error or log a warning.
-                # For now, we'll skip assigning a type, or could default to string if absolutely necessary.
-                pass
-
-            properties[name] = schema
-            if param.default == inspect.Parameter.empty:
-                required.append(name)
-        parameters_schema = {"type": "object", "properties": properties}
-        if required:
-            parameters_schema["required"] = required
-        return parameters_schema
+    Memoized per (function, strict) pair since add_tool runs on every
+    Streamlit rerun with the same functions. Callers pass the underlying
+    function of bound methods so cache keys never hold instances alive.
+
+    :param func: The function to get the parameters from.
+    :return: A dictionary representing the JSON schema of the parameters.
+    """
+    sig = inspect.signature(func)
+    properties = {}
+    required = []
+
+    for name, param in sig.parameters.items():
+        if name == "self":
+            # Present when the underlying function of a bound method is passed
+            continue
+        if param.annotation == inspect.Parameter.empty:
+            # Default to 'string' for parameters without type hints
+            schema = {"type": "string"}
+        else:
+            schema = _annotation_schema(param.annotation, strict)
+
+        properties[name] = schema
+        if param.default == inspect.Parameter.empty:
+            required.append(name)
+    parameters_schema = {"type": "object", "properties": properties}
+    if required:
+        parameters_schema["required"] = required
+    return parameters_schema
+
+
+def _annotation_schema(param_type, strict: bool) -> dict:
+    """
+    Maps one type annotation to its JSON schema.
+
+    Primitives resolve through a table lookup; Literal, list and dict are
+    handled via get_origin, recursing into list item types so nested
+    annotations like List[List[int]] work.
+
+    :param param_type: The annotation to map.
+    :param strict: Whether strict mode is enabled for the tool.
+    :return: The JSON schema for the annotation, empty if unsupported.
+    """
+    schema = {}
+    origin = get_origin(param_type)
+    if param_type in _PRIMITIVES:
+        schema["type"] = _PRIMITIVES[param_type]
+    elif origin is Literal:
+        schema["type"] = "string"  # Literals are often strings
+        schema["enum"] = list(get_args(param_type))
+    elif origin in (list, List):
+        schema["type"] = "array"
+        # Process the type of items in the list
+        if get_args(param_type):
+            item_schema = _annotation_schema(get_args(param_type)[0], strict)
+            schema["items"] = item_schema or {"type": "string"}
+        else:
+            schema["items"] = {"type": "string"}  # Default for list with no specified item type
+    elif origin in (dict, Dict):
+        schema["type"] = "object"
+        # For a generic Dict, OpenAI functions usually expect 'object' without
+        # specific properties, additionalProperties allows any of them
+        schema["additionalProperties"] = not strict
+    # Unhandled complex types keep an empty schema, same as before
+    return schema
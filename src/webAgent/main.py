@@ -1,19 +1,58 @@
+import asyncio
+import atexit
 import os
+import threading
+import time
+import weakref
+from collections import deque
 
 import streamlit as st
 
 from webAgent import Agent, WebDriver
 
-agent = Agent(api_key=os.getenv("API_KEY"), base_url=os.getenv("BASE_URL"))
+
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    One long-lived event loop on a background thread, shared by all reruns.
+
+    The keep-alive connection pool and the OpenAI clients bind their
+    transports to the loop that created them, so running each prompt on a
+    fresh loop would hand back connections attached to a closed loop.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+@st.cache_resource
+def get_driver_registry() -> set:
+    """
+    Process-wide registry of live WebDrivers, with a single atexit hook.
+
+    Drivers are removed when their session closes them, so the hook only
+    quits what is still open at interpreter exit and never double-quits.
+    """
+    drivers: set = set()
+    atexit.register(lambda: [driver.close() for driver in list(drivers)])
+    return drivers
+
+
+# One Agent per session: tools are bound methods of the session's WebDriver,
+# a process-global Agent would let one session's prompts drive another's browser
+if "agent" not in st.session_state:
+    st.session_state.agent = Agent(api_key=os.getenv("API_KEY"), base_url=os.getenv("BASE_URL"))
+agent = st.session_state.agent
 
 st.title("Web Agent")
 
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    # Full model-facing history, including tool calls and tool results
+    st.session_state.messages = deque()
+    # Chat-visible subset kept separately so reruns render without re-filtering
+    st.session_state.chat_display = deque()
 
-for message in st.session_state.messages:
-    if "tool_calls" in message or message["role"] == "tool":
-        continue
+for message in st.session_state.chat_display:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
@@ -32,34 +71,109 @@ executable_path_input = st.sidebar.text_input(
 headless_mode = st.sidebar.checkbox("Run in headless mode", key="headless_mode")
 
 
-def handle_close() -> str:
+def run_async_stream(agen):
+    """
+    Consume an async generator from Streamlit's synchronous script,
+    yielding each item as soon as it is produced.
+
+    Every step runs on the shared background loop so connections opened on
+    one prompt stay usable on the next.
+    """
+    loop = get_event_loop()
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(anext(agen), loop).result()
+        except StopAsyncIteration:
+            break
+
+
+def debounce_stream(stream, max_chunks: int = 50, max_delay: float = 0.25):
+    """
+    Batch streamed chunks so Streamlit re-renders once per batch instead of
+    once per token. The first chunk is flushed immediately to keep the
+    time-to-first-token unchanged; after that batches are cut by size, with
+    the delay bound only capping how long a slow stream can hold a batch.
+    """
+    buffer = []
+    first_buffered = None
+    first = True
+    for chunk in stream:
+        if first:
+            first = False
+            yield chunk
+            continue
+        buffer.append(chunk)
+        if first_buffered is None:
+            first_buffered = time.monotonic()
+        if len(buffer) >= max_chunks or time.monotonic() - first_buffered >= max_delay:
+            yield "".join(buffer)
+            buffer.clear()
+            first_buffered = None
+    if buffer:
+        yield "".join(buffer)
+
+
+def reset_browser() -> None:
     """
-    Closes the website & WebDriver.
-    This function is called when the agent is done.
+    Close this session's browser and clear its state.
+    Runs on the script thread, where the real session state is available.
     """
     if "web" in st.session_state:
+        get_driver_registry().discard(st.session_state.web)
         st.session_state.web.close()
         del st.session_state["web"]
 
 
+if st.sidebar.button("Reset browser"):
+    reset_browser()
+
 if prompt := st.chat_input("What is up?"):
     with st.spinner("Wait for it...", show_time=True):
         if "web" not in st.session_state:
-            st.session_state.web = WebDriver(
+            web = WebDriver(
                 browser_name=st.session_state.selected_webdriver,
                 headless=st.session_state.headless_mode,
                 executable_path=st.session_state.executable_path if st.session_state.executable_path else None,
             )
-        agent.add_tool(st.session_state.web.open_website)
-        agent.add_tool(st.session_state.web.click_action)
-        agent.add_tool(st.session_state.web.type_action)
-        agent.add_tool(handle_close)
+            st.session_state.web = web
+            get_driver_registry().add(web)
+            # Weak so neither the registered tool nor the schema cache pins
+            # the driver once the session has dropped it
+            web_ref = weakref.ref(web)
+
+            def handle_close() -> str:
+                """
+                Closes the website & WebDriver.
+                This function is called when the agent is done.
+                """
+                # Tool calls run on executor threads where st.session_state is
+                # the process-global mock, so only the captured driver and the
+                # thread-safe registry are touched here; the script thread
+                # drops the session entry once the stream has finished
+                web = web_ref()
+                if web is None:
+                    return "Web driver already closed"
+                get_driver_registry().discard(web)
+                return web.close()
+
+            # Register tools once per browser session instead of once per prompt,
+            # WebDriver tools share one browser so they are not parallel safe
+            agent.add_tool(web.open_website, parallel_safe=False)
+            agent.add_tool(web.click_action, parallel_safe=False)
+            agent.add_tool(web.type_action, parallel_safe=False)
+            agent.add_tool(handle_close, parallel_safe=False)
 
     st.session_state.messages.append({"role": "user", "content": prompt})
+    st.session_state.chat_display.append({"role": "user", "content": prompt})
     with st.chat_message("user"):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
         agent_response = agent.send(model=os.getenv("MODEL_NAME"), messages=st.session_state.messages)
-        response = st.write_stream(agent_response)
+        response = st.write_stream(debounce_stream(run_async_stream(agent_response)))
+    # handle_close cannot clear session state from its tool thread, so the
+    # stale entry is dropped here once the driver has left the registry
+    if "web" in st.session_state and st.session_state.web not in get_driver_registry():
+        del st.session_state["web"]
     st.session_state.messages.append({"role": "assistant", "content": response})
+    st.session_state.chat_display.append({"role": "assistant", "content": response})
@@ -0,0 +1,73 @@
+"""
+FastAPI backend that streams agent responses over Server-Sent Events.
+
+Tokens are delivered as soon as the model produces them instead of being
+buffered behind a blocking UI thread. Run with:
+
+    uvicorn server:app --app-dir src/webAgent
+"""
+
+import json
+import os
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from webAgent import Agent, WebDriver
+
+app = FastAPI(title="Web Agent")
+
+agent = Agent(api_key=os.getenv("API_KEY"), base_url=os.getenv("BASE_URL"))
+
+# One browser session per server process, created on the first chat request
+_web: WebDriver | None = None
+
+
+def handle_close() -> str:
+    """
+    Closes the website & WebDriver.
+    This function is called when the agent is done.
+    """
+    global _web
+    if _web is not None:
+        _web.close()
+        _web = None
+
+
+def get_web() -> WebDriver:
+    global _web
+    if _web is None:
+        _web = WebDriver(
+            browser_name=os.getenv("BROWSER_NAME", "Remote"),
+            headless=bool(os.getenv("HEADLESS")),
+        )
+        # WebDriver tools share one browser session, so they are not parallel safe
+        agent.add_tool(_web.open_website, parallel_safe=False)
+        agent.add_tool(_web.click_action, parallel_safe=False)
+        agent.add_tool(_web.type_action, parallel_safe=False)
+        agent.add_tool(handle_close, parallel_safe=False)
+    return _web
+
+
+class ChatRequest(BaseModel):
+    messages: list = []
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest) -> StreamingResponse:
+    """
+    Stream the agent response for the given message history as SSE.
+    """
+    get_web()
+
+    async def event_stream():
+        async for token in agent.send(model=os.getenv("MODEL_NAME"), messages=request.messages):
+            yield f"data: {json.dumps({'token': token})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
+    )
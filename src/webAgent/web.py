@@ -1,27 +1,323 @@
+import concurrent.futures
+import functools
+import hashlib
+import re
 from typing import Literal
 
-from bs4 import BeautifulSoup
+import soupsieve as sv
+from bs4 import BeautifulSoup, SoupStrainer
 from loguru import logger
-from markdownify import markdownify
+from markdownify import MarkdownConverter
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.by import By
 from selenium.webdriver.edge.options import Options as EdgeOptions
 from selenium.webdriver.edge.service import Service as EdgeService
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.safari.options import Options as SafariOptions
 from selenium.webdriver.safari.service import Service as SafariService
+from selenium.webdriver.support.ui import WebDriverWait
+
+try:
+    # C-based lexbor parser, an order of magnitude faster than html.parser
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    # libxml2-backed parser for the BeautifulSoup fallback path
+    import lxml  # noqa: F401
+
+    _BS4_PARSER = "lxml"
+except ImportError:
+    _BS4_PARSER = "html.parser"
+
+# Tags that never contribute text or interactive elements to the agent
+_NOISE_TAGS = ["style", "script", "link", "svg", "path", "img", "noscript", "iframe"]
+
+# Drops script/style/svg/noscript blocks and comments before the tree is even
+# built, they would be discarded anyway and often dominate the page bytes
+_STRIP_RE = re.compile(r"<(script|style|noscript|svg)\b[^>]*>.*?</\1\s*>|<!--.*?-->", re.I | re.S)
+
+# Matches hiding styles without normalizing the attribute string first
+_HIDDEN_STYLE_RE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.I)
+
+# Selectors compiled once at import so soupsieve does not re-tokenize them per page
+_HIDDEN_SELECTOR = sv.compile('[hidden], [type="hidden" i]')
+_STYLED_SELECTOR = sv.compile("[style]")
+_INTERACTIVE_SELECTOR = sv.compile("button, input, textarea, select, datalist, area, [contenteditable]")
+
+# Attributes worth surfacing in the interactive-element digest
+_DIGEST_ATTRS = ("type", "name", "value", "placeholder", "href", "role", "aria-label", "contenteditable")
+
+
+class _FastMarkdownConverter(MarkdownConverter):
+    """
+    Narrowed markdown converter for LLM-facing output: images collapse to
+    their alt text and tables to their plain text, skipping the alignment
+    and attribute work the agent never reads.
+
+    markdownify >= 1.0 invokes converters with keyword arguments
+    (parent_tags=...) while older releases pass convert_as_inline
+    positionally; *args/**kwargs keeps the overrides working on both.
+    """
+
+    def convert_img(self, el, text, *args, **kwargs):
+        return el.get("alt", "") or ""
+
+    # Cells are rendered before the table converter runs, so the pipe-table
+    # markup has to be suppressed at the td/tr/th level
+    def convert_td(self, el, text, *args, **kwargs):
+        return text.strip() + " "
+
+    def convert_th(self, el, text, *args, **kwargs):
+        return text.strip() + " "
+
+    def convert_tr(self, el, text, *args, **kwargs):
+        return text.rstrip() + "\n"
+
+    def convert_table(self, el, text, *args, **kwargs):
+        return text
+
+
+# One converter instance reused for every page
+_MD_CONVERTER = _FastMarkdownConverter()
+
+
+def _describe_element(tag: str, attrs: dict, text: str) -> str:
+    """
+    Builds a compact one-line digest of an interactive element,
+    keeping the id so the agent can still target it with actions.
+
+    :param tag: The element's tag name.
+    :param attrs: The element's attributes.
+    :param text: The element's visible text.
+    :return: A single digest line (e.g. 'input#custom-id-3 type=email placeholder=Your email').
+    """
+    parts = [f"{tag}#{attrs['id']}" if attrs.get("id") else tag]
+    text = " ".join((text or "").split())
+    if text:
+        parts.append(f'"{text[:80]}"')
+    for attr in _DIGEST_ATTRS:
+        value = attrs.get(attr)
+        if value:
+            parts.append(f"{attr}={value}")
+    return " ".join(parts)
+
+
+# Hashes the serialized DOM inside the browser, so deciding whether to
+# re-transfer the full page source only moves two integers over the wire
+_PAGE_HASH_JS = """
+const s = document.documentElement.outerHTML;
+let h = 0;
+for (let i = 0; i < s.length; i++) { h = (h * 31 + s.charCodeAt(i)) | 0; }
+return [h, s.length];
+"""
+
+# Counts DOM mutations browser-side so polling only moves an integer over the
+# wire, and records the ids of mutated elements so small changes can be pulled
+# as subtrees instead of the whole DOM; idempotent so it can be re-run after
+# every navigation. Mutations on nodes with no identifiable ancestor set
+# __mutLost, which forces the full-page path. Returns true when it just
+# installed into a fresh document, so the caller can reset its baseline.
+_MUTATION_OBSERVER_JS = """
+if (!window.__mutObserver) {
+    window.__mut = 0;
+    window.__mutated = new Set();
+    window.__mutLost = false;
+    window.__mutObserver = new MutationObserver((mutations) => {
+        window.__mut++;
+        for (const m of mutations) {
+            let el = m.target;
+            while (el && !(el.nodeType === 1 && el.id)) el = el.parentElement;
+            if (el) window.__mutated.add(el.id);
+            else window.__mutLost = true;
+        }
+    });
+    window.__mutObserver.observe(document, {subtree: true, childList: true, attributes: true});
+    return true;
+}
+return false;
+"""
+
+# Drains the recorded mutation set, returning [lost, count, joined outerHTML]
+_DRAIN_MUTATIONS_JS = """
+if (!window.__mutated) return [1, 0, ""];
+const lost = window.__mutLost ? 1 : 0;
+window.__mutLost = false;
+const ids = [...window.__mutated];
+window.__mutated.clear();
+const html = ids
+    .map(id => { const el = document.getElementById(id); return el ? el.outerHTML : ""; })
+    .filter(Boolean)
+    .join("\\n");
+return [lost, ids.length, html];
+"""
+
+# Above these bounds an incremental diff stops being cheaper than a full fetch
+_MAX_DELTA_NODES = 20
+_MAX_DELTA_CHARS = 30000
+
+# Injected scripts kept as module constants so each call reuses the same string
+_GENERATE_IDS_JS = """
+// Only elements the agent can act on need an id, tagging every
+// node bloats the serialized DOM and the prompt
+const elements = document.body.querySelectorAll(
+    'button, input, textarea, select, datalist, area, a, [contenteditable], [onclick], [role="button"]'
+);
+let idCounter = 1;
+
+elements.forEach(el => {
+    if (!el.id) {
+        el.id = `custom-id-${idCounter++}`;
+    }
+});
+"""
+
+_CLICK_JS = (
+    "const el = document.getElementById(arguments[0]);"
+    "if (!el) return 'missing';"
+    "el.scrollIntoView(true); el.click(); return 'ok';"
+)
+
+_TYPE_JS = (
+    "const el = document.getElementById(arguments[0]);"
+    "if (!el) return 'missing';"
+    "el.scrollIntoView(true); el.value = arguments[1]; return 'ok';"
+)
+
+
+def _build_options(browser_name: str, headless: bool, lightweight: bool):
+    """
+    Builds the Options object for a browser with the shared configuration
+    (eager page loading, optional headless mode, lightweight preferences).
+
+    :param browser_name: The browser the options are for.
+    :param headless: Whether to run without a GUI (ignored for Safari/Remote).
+    :param lightweight: Whether to disable image and media loading.
+    :return: The configured Options instance.
+    """
+    if browser_name == "Safari":
+        options = SafariOptions()
+        options.page_load_strategy = "eager"
+        return options
+
+    if browser_name in ("Firefox", "Remote"):
+        options = FirefoxOptions()
+        if lightweight:
+            options.set_preference("permissions.default.image", 2)
+            options.set_preference("media.autoplay.enabled", False)
+    else:
+        options = ChromeOptions() if browser_name == "Chrome" else EdgeOptions()
+        if lightweight:
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    options.page_load_strategy = "eager"
+    if headless and browser_name != "Remote":
+        options.add_argument("--headless")
+    return options
+
+
+@functools.lru_cache(maxsize=16)
+def _clean_html(html: str) -> str:
+    """
+    Cleans the HTML by removing unwanted tags and attributes.
+
+    Deterministic in its input, so the result is memoized: re-cleaning an
+    unchanged page is a cache hit instead of a full parse.
+
+    :param html: The HTML source to clean.
+    :return: The cleaned markdown source.
+    """
+    if LexborHTMLParser is not None:
+        return _clean_html_lexbor(html)
+    return _clean_html_bs4(html)
+
+
+def _clean_html_lexbor(html: str) -> str:
+    """
+    Cleans the HTML using the C-based lexbor parser.
+
+    :param html: The HTML source to clean.
+    :return: The cleaned markdown source.
+    """
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(_NOISE_TAGS)
+
+    # Remove hidden elements
+    for node in tree.css('[hidden], input[type="hidden"]'):
+        node.decompose()
+    for node in tree.css("[style]"):
+        style = node.attributes.get("style")
+        if style and _HIDDEN_STYLE_RE.search(style):
+            node.decompose()
+
+    # Summarize all interactive elements into one digest line each,
+    # collected in a list so assembly stays linear
+    interactive_parts = ["\n\n## Interactive Elements\n"]
+    for node in tree.css("button, input, textarea, select, datalist, area, [contenteditable]"):
+        attrs = dict(node.attributes)
+        interactive_parts.append(f"\n- {_describe_element(node.tag, attrs, node.text())}")
+        node.decompose()
+    interactive_md = "".join(interactive_parts)
+
+    # Convert to markdown
+    body = tree.body
+    md = _MD_CONVERTER.convert(body.html if body is not None else tree.html)
+    result = md + interactive_md
+    return result
+
+
+def _clean_html_bs4(html: str) -> str:
+    """
+    Fallback cleaning path using BeautifulSoup when selectolax is unavailable.
+
+    :param html: The HTML source to clean.
+    :return: The cleaned markdown source.
+    """
+    # The lexbor path strips these tags in C; here the regex pre-filter keeps
+    # them out of the much slower Python/lxml tree build
+    html = _STRIP_RE.sub("", html)
+    # Build only the <body> subtree, <head> never reaches the output anyway
+    soup = BeautifulSoup(html, _BS4_PARSER, parse_only=SoupStrainer("body"))
+
+    # Remove hidden elements, matched C-side by soupsieve instead of a
+    # Python lambda invoked on every node
+    for tag in _HIDDEN_SELECTOR.select(soup):
+        tag.decompose()
+    for tag in _STYLED_SELECTOR.select(soup):
+        style = tag.get("style")
+        if style and _HIDDEN_STYLE_RE.search(style):
+            tag.decompose()
+
+    # Get all interactive elements in html only
+    interactive_elements = _INTERACTIVE_SELECTOR.select(soup)
+    interactive_parts = ["\n\n## Interactive Elements\n"]
+    for el in interactive_elements:
+        interactive_parts.append(f"\n- {_describe_element(el.name, el.attrs, el.get_text())}")
+        el.decompose()
+    interactive_md = "".join(interactive_parts)
+
+    # Convert the already-parsed tree directly, skipping the
+    # serialize-then-reparse round trip markdownify(str) would do
+    md = _MD_CONVERTER.convert_soup(soup.body or soup)
+    result = md + interactive_md
+    return result
 
 
 class WebDriver:
+    # Runs HTML cleaning off the calling thread so it overlaps WebDriver round-trips
+    _executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
     def __init__(
         self,
         browser_name: Literal["Remote", "Firefox", "Chrome", "Edge", "Safari"] = "Firefox",
         command_executor: str = "http://localhost:4444",
         headless: bool = False,
         executable_path: str = None,
+        lightweight: bool = True,
     ):
         """
         Manages a Selenium WebDriver instance for browser automation.
@@ -42,97 +338,72 @@ class WebDriver:
             executable_path: Optional path to the browser driver executable.
                 If not provided, Selenium will try to find it in the system PATH.
                 Defaults to None.
+            lightweight: If True, image and media loading is disabled so pages
+                settle faster and serialize smaller; the agent only reads DOM
+                text and interactive elements anyway. Defaults to True.
 
         Raises:
             ValueError: If an unsupported `browser_name` is provided.
         """
         self.driver = None
+        options = _build_options(browser_name, headless, lightweight)
         if browser_name == "Firefox":
-            options = FirefoxOptions()
-            if headless:
-                options.add_argument("--headless")
             service = FirefoxService(executable_path=executable_path) if executable_path else None
             self.driver = webdriver.Firefox(options=options, service=service)
         elif browser_name == "Chrome":
-            options = ChromeOptions()
-            if headless:
-                options.add_argument("--headless")
             service = ChromeService(executable_path=executable_path) if executable_path else None
             self.driver = webdriver.Chrome(options=options, service=service)
         elif browser_name == "Edge":
-            options = EdgeOptions()
-            if headless:
-                options.add_argument("--headless")
             service = EdgeService(executable_path=executable_path) if executable_path else None
             self.driver = webdriver.Edge(options=options, service=service)
         elif browser_name == "Safari":
-            options = SafariOptions()
             service = SafariService(executable_path=executable_path) if executable_path else None
             self.driver = webdriver.Safari(options=options, service=service)
         elif browser_name == "Remote":
-            options = FirefoxOptions()
             self.driver = webdriver.Remote(command_executor=command_executor, options=options)
         else:
             raise ValueError(
                 f"Unsupported browser: {browser_name}. Choose from 'Firefox', 'Chrome', 'Edge', 'Safari', 'Remote'."
             )
+        # With the eager strategy driver.get returns at DOMContentLoaded,
+        # wait_for_change handles late mutations; never hang on slow pages
+        self.driver.set_page_load_timeout(10)
+        # Chromium drivers expose the DevTools protocol over a persistent
+        # WebSocket, much cheaper than the WebDriver wire for big payloads
+        self._cdp = getattr(self.driver, "execute_cdp_cmd", None)
         if self.driver:
-            self.latest_source = self.driver.page_source
+            self.latest_source = self.__page_source()
+            self.latest_url = self.driver.current_url
         else:
             self.latest_source = ""
+            self.latest_url = ""
+        self._last_mut = 0
+        # Browser-side (hash, length) of the last transferred page source
+        self._last_page_hash = None
+        # Digest of the cleaned markdown last returned per URL, used to avoid
+        # embedding the identical page snapshot into the prompt twice
+        self._source_hashes = {}
 
-    def __clean_html(self, html: str) -> str:
+    def __page_source(self) -> str:
         """
-        Cleans the HTML by removing unwanted tags and attributes.
+        Fetches the serialized DOM, over CDP when available.
 
-        :param html: The HTML source to clean.
-        :return: The cleaned markdown source.
+        :return: The current page source.
         """
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Remove hidden elements
-        for tag in list(
-            soup.find_all(
-                lambda tag: (
-                    tag.has_attr("hidden")
-                    or tag.get("type", "").lower() == "hidden"
-                    or "display:none" in "".join(tag.get("style", "").lower().split())
-                    or "visibility:hidden" in "".join(tag.get("style", "").lower().split())
+        if self._cdp is not None:
+            try:
+                result = self._cdp(
+                    "Runtime.evaluate",
+                    {"expression": "document.documentElement.outerHTML", "returnByValue": True},
                 )
-            )
-        ):
-            tag.decompose()
-
-        # Get all interactive elements in html only
-        interactive_elements = soup.find_all(
-            lambda tag: (
-                tag.name in ["button", "input", "textarea", "select", "datalist", "area"]
-                or tag.has_attr("contenteditable")
-            )
-        )
-        interactive_md = "\n\n## Interactive Elements\n"
-        for el in interactive_elements:
-            interactive_md += f"\n```html\n{el.prettify()}```\n"
-            el.decompose()
-
-        # Convert to markdown
-        md = markdownify(soup.body.prettify())
-        result = md + interactive_md
-        return result
+                return result["result"]["value"]
+            except Exception as e:
+                logger.warning(f"CDP page source fetch failed, falling back to WebDriver wire: {e}\n")
+                self._cdp = None
+        return self.driver.page_source
 
     def __generate_ids(self):
-        self.driver.execute_script(
-            """
-            const elements = document.body.querySelectorAll('*'); // Select all elements inside body
-            let idCounter = 1;
-
-            elements.forEach(el => {
-                if (!el.id) {
-                    el.id = `custom-id-${idCounter++}`;
-                }
-            });
-            """
-        )
+        self.driver.execute_script(_GENERATE_IDS_JS)
 
     def open_website(self, url: str, next_step: str) -> str:
         """
@@ -170,8 +441,11 @@ class WebDriver:
 
         logger.info(f"🔧 1/2 Action: click_action | Id: {element_id}\n")
         try:
-            element = self.driver.find_element(By.ID, element_id)
-            self.driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", element)
+            # Lookup, scroll and click in one round-trip instead of three
+            outcome = self.driver.execute_script(_CLICK_JS, element_id)
+            if outcome == "missing":
+                logger.error(f"🔧 2/2 Action: click_action | Element {element_id} not found\n")
+                return f"Result: Element {element_id} not found"
             change = self.wait_for_change(f"🔧 2/2 Action: click_action | Next Step: {next_step}\n")
             return f"Result: \n{change}, Next Step: {next_step}"
         except Exception as e:
@@ -193,35 +467,87 @@ class WebDriver:
         """
         logger.info(f"🔧 1/2 Action: type_action | Id: {element_id} | Value: {value}\n")
         try:
-            element = self.driver.find_element(By.ID, element_id)
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView(true); arguments[0].value = arguments[1];", element, value
-            )
+            # Lookup, scroll and assignment in one round-trip instead of three
+            outcome = self.driver.execute_script(_TYPE_JS, element_id, value)
+            if outcome == "missing":
+                logger.error(f"🔧 2/2 Action: type_action | Element {element_id} not found\n")
+                return f"Result: Element {element_id} not found"
             change = self.wait_for_change(f"🔧 2/2 Action: type_action | Next Step: {next_step}\n")
             return f"Result: \n{change}, Next Step: {next_step}"
         except Exception as e:
             logger.error(f"🔧 2/2 Action: type_action | Error: {e}\n")
             return f"Result: Error typing into element {element_id}: {e}"
 
-    def wait_for_change(self, log: str = None, counter=0) -> str:
+    def __install_mutation_observer(self):
+        fresh = self.driver.execute_script(_MUTATION_OBSERVER_JS)
+        if fresh:
+            # Fresh document (navigation, reload, same-URL form POST): its
+            # counter restarts at 0, so comparing against the previous
+            # document's count would make the wait burn the full timeout
+            self._last_mut = 0
+
+    def wait_for_change(self, log: str = None, timeout: float = 9) -> str:
         """
-        Wait for source to change.
+        Wait for the page to change.
+
+        Waits on a browser-side mutation counter so each poll only moves an
+        integer over the wire instead of the full page source.
 
+        :param log: Optional message logged once the wait is over.
+        :param timeout: Maximum seconds to wait for a change.
         :return: The Markdown page after the change.
         """
-        last_source = self.latest_source
-        if last_source == self.driver.page_source and counter < 3:
-            self.driver.implicitly_wait(3)
-            return self.wait_for_change(log, counter + 1)
-        else:
-            if log:
-                logger.success(log)
+        try:
+            # Let the document settle before watching for mutations, so a
+            # mid-load snapshot is not mistaken for the final page
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+        except TimeoutException:
+            logger.warning(f"🔧 Document not complete within {timeout}s\n")
 
-            self.__generate_ids()
-            self.latest_source = self.driver.page_source
-            self.latest_url = self.driver.current_url
-            response = f"Current Website: {self.latest_url}\nSource: {self.__clean_html(self.latest_source)}"
-            return response
+        self.__install_mutation_observer()
+        try:
+            # A fresh same-URL document (form POST, reload) may never mutate
+            # after DOMContentLoaded, so the browser-side page hash is part of
+            # the predicate too — still only integers over the wire per poll
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script("return window.__mut || 0;") > self._last_mut
+                or d.current_url != self.latest_url
+                or tuple(d.execute_script(_PAGE_HASH_JS)) != self._last_page_hash
+            )
+        except TimeoutException:
+            # No detectable change, return the current state anyway
+            logger.warning(f"🔧 No page change detected within {timeout}s\n")
+
+        if log:
+            logger.success(log)
+
+        self.__generate_ids()
+        if self.driver.current_url == self.latest_url and self.latest_source:
+            # Same document: when every mutation maps to an identifiable node
+            # and the change set is small, return just the changed subtrees
+            lost, count, fragments = self.driver.execute_script(_DRAIN_MUTATIONS_JS)
+            if not lost and 0 < count <= _MAX_DELTA_NODES and 0 < len(fragments) <= _MAX_DELTA_CHARS:
+                self._last_mut = self.driver.execute_script("return window.__mut || 0;")
+                return f"Current Website: {self.latest_url}\nChanged Fragments:\n{_clean_html(fragments)}"
+        page_hash = tuple(self.driver.execute_script(_PAGE_HASH_JS))
+        if page_hash != self._last_page_hash or not self.latest_source:
+            # Only transfer the full source when the browser-side hash moved
+            self.latest_source = self.__page_source()
+            self._last_page_hash = page_hash
+        # Clean in the background while the remaining WebDriver round-trips run
+        cleaned = WebDriver._executor.submit(_clean_html, self.latest_source)
+        self.latest_url = self.driver.current_url
+        self._last_mut = self.driver.execute_script("return window.__mut || 0;")
+        cleaned_source = cleaned.result()
+        digest = hashlib.blake2b(cleaned_source.encode(), digest_size=8).hexdigest()
+        if self._source_hashes.get(self.latest_url) == digest:
+            # Identical snapshot already sent for this URL, reference it instead
+            return f"Current Website: {self.latest_url}\nSource: (unchanged since ref={digest})"
+        self._source_hashes[self.latest_url] = digest
+        response = f"Current Website: {self.latest_url}\nSource: {cleaned_source}"
+        return response
 
     def close(self) -> str:
         """